@@ -1,21 +1,78 @@
+import time
+STARTED_AT = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from google import genai
-from google.genai import types
+from contextlib import asynccontextmanager
 import os
 from dotenv import load_dotenv
+import threading
 import warnings
 import json
 import glob
 import random
 from datetime import datetime
+import cassette
+from cassette import stage
 
 # Suppress the annoying search warning
 warnings.filterwarnings("ignore", category=RuntimeWarning) 
-from duckduckgo_search import DDGS
+
+# google.genai and duckduckgo_search are heavy; they are imported lazily (see WARMUP below)
+# so health and history endpoints answer straight away on a cold start.
+genai = None
+types = None
+DDGS = None
 
 load_dotenv()
-app = FastAPI()
+CASSETTE = cassette.Cassette.from_env()  # record/replay upstream calls, see cassette.py
+
+# --- 0. WARMUP ---
+WARMUP = {"ready": False, "error": None, "seconds": None}
+_import_lock = threading.Lock()
+
+def load_llm():
+    global genai, types
+    with _import_lock:
+        if genai is None:
+            from google import genai as _genai
+            from google.genai import types as _types
+            genai, types = _genai, _types
+    return genai, types
+
+def load_search():
+    global DDGS
+    with _import_lock:
+        if DDGS is None:
+            from duckduckgo_search import DDGS as _DDGS
+            DDGS = _DDGS
+    return DDGS
+
+def warmup():
+    t0 = time.perf_counter()
+    try:
+        load_llm()
+        load_search()
+    except Exception as e:
+        print(f"Warmup Error: {e}")
+        WARMUP["error"] = str(e)
+    # seconds before ready, so /ready never reports ready with warmup_seconds still null
+    WARMUP["seconds"] = round(time.perf_counter() - t0, 3)
+    if WARMUP["error"] is None: WARMUP["ready"] = True
+
+@asynccontextmanager
+async def lifespan(app):
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    yield
+    if CASSETTE: CASSETTE.save()
+
+app = FastAPI(lifespan=lifespan)
+
+@app.exception_handler(cassette.CassetteMiss)
+def cassette_miss(request, exc):
+    # Replay misses must fail loudly, never fall through to the fallback answers below
+    return JSONResponse(status_code=500, content={"detail": f"Cassette miss: {exc.args[0]}"})
 
 # --- 1. UPGRADED KNOWLEDGE BASE (Now with URLs) ---
 TOOL_PRICING = {
@@ -66,23 +123,29 @@ class PlanRequest(BaseModel):
     vibe: str = "Senior Engineer"
 
 # --- 3. HISTORY SYSTEM ---
-HISTORY_DIR = "history"
-if not os.path.exists(HISTORY_DIR): os.makedirs(HISTORY_DIR)
+HISTORY_DIR = "history"  # created on first save, not at import
 
 class HistoryItem(BaseModel):
     id: str; timestamp: str; app_idea: str; budget: str; skill: str; plan: str 
 
 # --- 4. HELPERS ---
 def get_client():
+    if CASSETTE: return CASSETTE.wrap_client(_live_client)
+    return _live_client()
+
+def _live_client():
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key: raise HTTPException(status_code=500, detail="GEMINI_API_KEY missing")
+    genai, _ = load_llm()
     return genai.Client(api_key=api_key)
 
 def perform_live_search(query: str, max_results=3):
     print(f"🔎 Searching: {query}")
     try:
-        results = DDGS().text(query, max_results=max_results)
-        return "\n".join([f"- {r['title']}: {r['body']}" for r in results])
+        ddgs = CASSETTE.wrap_search(lambda: load_search()()) if CASSETTE else load_search()()
+        with stage("search"): results = ddgs.text(query, max_results=max_results)
+        with stage("parse"): return "\n".join([f"- {r['title']}: {r['body']}" for r in results])
+    except cassette.CassetteMiss: raise
     except Exception as e:
         print(f"Search Error: {e}")
         return "No live search results available. Rely on internal knowledge."
@@ -91,9 +154,18 @@ def perform_live_search(query: str, max_results=3):
 @app.get("/")
 def health_check(): return {"status": "online", "model": "gemini-1.5-pro"}
 
+@app.get("/ready")
+def readiness_check():
+    # 503 until the LLM/search modules are imported, so the host can hold traffic on the warm path
+    body = {"ready": WARMUP["ready"], "warmup_seconds": WARMUP["seconds"], "error": WARMUP["error"],
+            "uptime_seconds": round(time.perf_counter() - STARTED_AT, 3)}
+    if not WARMUP["ready"]: raise HTTPException(status_code=503, detail=body)
+    return body
+
 @app.post("/analyze_idea")
 def analyze_idea(request: IdeaRequest):
     client = get_client()
+    _, types = load_llm()
     
     # Updated Prompt: Force 3-5 distinct, non-generic questions
     prompt = f"""
@@ -111,21 +183,25 @@ def analyze_idea(request: IdeaRequest):
     """
     try:
         # Using 1.5-pro for smarter questions with higher temp for randomness
-        response = client.models.generate_content(
-            model="gemini_2.5-flash", 
-            contents=prompt,
-            config=types.GenerateContentConfig(temperature=0.9)
-        )
-        text = response.text if response.text else ""
-        lines = [l.strip() for l in text.split('\n') if l.strip()]
-        questions = [l.lstrip('0123456789.-*) ').strip() for l in lines]
-        return {"questions": questions[:5]} # Cap at 5
+        with stage("llm"):
+            response = client.models.generate_content(
+                model="gemini_2.5-flash", 
+                contents=prompt,
+                config=types.GenerateContentConfig(temperature=0.9)
+            )
+        with stage("parse"):
+            text = response.text if response.text else ""
+            lines = [l.strip() for l in text.split('\n') if l.strip()]
+            questions = [l.lstrip('0123456789.-*) ').strip() for l in lines]
+            return {"questions": questions[:5]} # Cap at 5
+    except cassette.CassetteMiss: raise
     except Exception as e:
         return {"questions": ["Does this app need real-time chat?", "Will users upload videos/images?", "Do you need a web admin panel?"]}
 
 @app.post("/generate_plan")
 def generate_plan(request: PlanRequest):
     client = get_client()
+    _, types = load_llm()
     
     # 1. Search (Specific Query)
     search_res = perform_live_search(f"best no-code tools to build {request.app_idea} 2025")
@@ -182,27 +258,30 @@ def generate_plan(request: PlanRequest):
     """
     
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", # Using the smarter model
-            contents=prompt,
-            config=types.GenerateContentConfig(response_mime_type="application/json")
-        )
-        
-        data = json.loads(response.text)
-        
-        # Match tools with URLs for the frontend
-        detected = []
-        all_text = str(data).lower()
-        for tool, info in TOOL_PRICING.items():
-            if tool.lower() in all_text:
-                # Add the tool, but ensure we have the URL
-                info_copy = info.copy()
-                info_copy['name'] = tool
-                detected.append(info_copy)
+        with stage("llm"):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash", # Using the smarter model
+                contents=prompt,
+                config=types.GenerateContentConfig(response_mime_type="application/json")
+            )
         
-        data['detected_tools'] = detected
+        with stage("parse"):
+            data = json.loads(response.text)
+            
+            # Match tools with URLs for the frontend
+            detected = []
+            all_text = str(data).lower()
+            for tool, info in TOOL_PRICING.items():
+                if tool.lower() in all_text:
+                    # Add the tool, but ensure we have the URL
+                    info_copy = info.copy()
+                    info_copy['name'] = tool
+                    detected.append(info_copy)
+            
+            data['detected_tools'] = detected
         return data
 
+    except cassette.CassetteMiss: raise
     except Exception as e:
         print(f"LLM Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -210,6 +289,7 @@ def generate_plan(request: PlanRequest):
 # --- HISTORY ENDPOINTS ---
 @app.post("/save_history")
 def save_history(item: HistoryItem):
+    os.makedirs(HISTORY_DIR, exist_ok=True)
     with open(f"{HISTORY_DIR}/{item.id}.json", "w") as f: json.dump(item.dict(), f)
     return {"status": "saved"}
 
@@ -0,0 +1,87 @@
+"""Cold start benchmark for the backend.
+
+Measures, each in a fresh interpreter:
+  - import time of backend.py
+  - time until GET / first answers (time-to-first-response)
+  - time until GET /ready reports the warm path
+
+A run that gets no 200 within --timeout (or whose server exited, e.g. because
+--port was already taken) is counted in failed_runs and the script exits 1.
+
+Usage: python bench_startup.py [--runs 5] [--port 8765]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+IMPORT_SNIPPET = "import time; t0 = time.perf_counter(); import backend; print(time.perf_counter() - t0)"
+
+
+def measure_import():
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def wait_for(url, proc, t0, timeout):
+    # Only count answers while our own server is alive, not another process already on --port
+    while time.perf_counter() - t0 < timeout and proc.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as r:
+                if r.status == 200: return time.perf_counter() - t0 if proc.poll() is None else None
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def measure_server(port, timeout):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "backend:app", "--port", str(port), "--log-level", "warning"])
+    try:
+        first = wait_for(f"http://127.0.0.1:{port}/", proc, t0, timeout)
+        ready = wait_for(f"http://127.0.0.1:{port}/ready", proc, t0, timeout)
+        return first, ready
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def summary(values):
+    values = [v for v in values if v is not None]
+    if not values: return None
+    return {"min": round(min(values), 4), "median": round(statistics.median(values), 4), "max": round(max(values), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    imports, firsts, readies = [], [], []
+    failed = {"first_response": 0, "ready": 0}
+    for _ in range(args.runs):
+        imports.append(measure_import())
+        first, ready = measure_server(args.port, args.timeout)
+        firsts.append(first); readies.append(ready)
+        if first is None: failed["first_response"] += 1
+        if ready is None: failed["ready"] += 1
+
+    print(json.dumps({
+        "runs": args.runs,
+        "import_seconds": summary(imports),
+        "first_response_seconds": summary(firsts),
+        "ready_seconds": summary(readies),
+        "failed_runs": failed,
+    }, indent=2))
+    if any(failed.values()): raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Record/replay cassettes for the Gemini and DuckDuckGo calls made by backend.py.
+
+A cassette is a gzipped JSON file holding, per upstream call, the request
+(prompt, model, config / query), the raw response and how long it took.
+Failed calls are recorded too and raised again on replay as RecordedError,
+so the endpoints take the same fallback path offline.
+
+Enable it on a running backend with env vars:
+  NALP_CASSETTE=cassettes/plans.json.gz
+  NALP_CASSETTE_MODE=record | replay
+  NALP_CASSETTE_TIMING=1   (replay only: sleep for the recorded latency)
+Each recording is appended to <cassette>.journal as it happens, so a killed
+process loses nothing; the journal is folded into the cassette on clean
+shutdown, or on the next load if the process died.
+
+replay_bench.py drives a whole corpus through the endpoints with a cassette.
+`python cassette.py` runs a record/replay round-trip self-check.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+MODES = ("record", "replay")
+FORMAT_VERSION = 1
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+class RecordedError(Exception):
+    """Replays an upstream call that failed while recording."""
+    def __init__(self, type_name, message):
+        super().__init__(message)
+        self.type_name = type_name
+
+
+# --- STAGE HOOK ---
+# backend.py wraps its search / llm / parse steps in stage(); replay_bench.py installs a hook to measure them.
+_stage_hook = None
+
+def set_stage_hook(hook):
+    global _stage_hook
+    _stage_hook = hook
+
+@contextmanager
+def stage(name):
+    if _stage_hook is None:
+        yield
+        return
+    with _stage_hook(name):
+        yield
+
+
+# --- CASSETTE ---
+def _dump(obj):
+    if hasattr(obj, "model_dump"): return obj.model_dump(mode="json", exclude_none=True)
+    return obj
+
+
+class Cassette:
+    def __init__(self, path, mode, timing=False):
+        if mode not in MODES: raise ValueError(f"Cassette mode must be one of {MODES}, got {mode!r}")
+        self.path, self.mode, self.timing = path, mode, timing
+        self.entries = {}
+        self.misses = 0
+        self.dirty = False
+        self.journal = f"{path}.journal"
+        self._lock = threading.Lock()
+        if mode == "replay" or os.path.exists(path) or os.path.exists(self.journal): self.load()
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get("NALP_CASSETTE")
+        if not path: return None
+        cassette = cls(path, os.environ.get("NALP_CASSETTE_MODE", "replay"), os.environ.get("NALP_CASSETTE_TIMING") == "1")
+        if cassette.mode == "record":
+            print(f"📼 Recording to {cassette.journal}; compacted into {path} on clean shutdown")
+        return cassette
+
+    def load(self):
+        if os.path.exists(self.path) or not os.path.exists(self.journal):
+            with gzip.open(self.path, "rt", encoding="utf-8") as f: self.entries = json.load(f)["entries"]
+        if os.path.exists(self.journal):
+            # Left behind by a process that died before save(); a torn last line is dropped
+            with open(self.journal, encoding="utf-8") as f:
+                for line in f:
+                    try: item = json.loads(line)
+                    except json.JSONDecodeError: continue
+                    self.entries[item.pop("key")] = item
+            self.dirty = True
+
+    def save(self):
+        # Held under the lock so no record() lands in the journal between the rewrite and its removal
+        with self._lock:
+            if not self.dirty: return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump({"version": FORMAT_VERSION, "entries": self.entries}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            if os.path.exists(self.journal): os.remove(self.journal)
+            self.dirty = False
+
+    @staticmethod
+    def key(kind, request):
+        blob = json.dumps([kind, request], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+    def record(self, kind, request, response, elapsed, error=None):
+        entry = {"kind": kind, "request": request, "response": response, "elapsed": round(elapsed, 4)}
+        if error is not None: entry["error"] = {"type": type(error).__name__, "message": str(error)}
+        key = self.key(kind, request)
+        with self._lock:
+            self.entries[key] = entry
+            self.dirty = True
+            os.makedirs(os.path.dirname(self.journal) or ".", exist_ok=True)
+            with open(self.journal, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, **entry}, separators=(",", ":")) + "\n")
+
+    def replay(self, kind, request):
+        entry = self.entries.get(self.key(kind, request))
+        if entry is None:
+            with self._lock: self.misses += 1
+            raise CassetteMiss(f"No {kind} recording in {self.path} for this request")
+        if self.timing: time.sleep(entry["elapsed"])
+        if "error" in entry: raise RecordedError(entry["error"]["type"], entry["error"]["message"])
+        return entry["response"]
+
+    def wrap_client(self, make_client):
+        return CassetteClient(self, None if self.mode == "replay" else make_client())
+
+    def wrap_search(self, make_ddgs):
+        return CassetteSearch(self, None if self.mode == "replay" else make_ddgs())
+
+
+# --- WRAPPERS ---
+class CassetteModels:
+    def __init__(self, cassette, models):
+        self.cassette, self.models = cassette, models
+
+    def generate_content(self, *, model, contents, config=None):
+        request = {"model": model, "contents": _dump(contents), "config": _dump(config)}
+        if self.cassette.mode == "replay":
+            raw = self.cassette.replay("generate_content", request)
+            from google.genai import types
+            return types.GenerateContentResponse.model_validate(raw)
+        t0 = time.perf_counter()
+        try:
+            response = self.models.generate_content(model=model, contents=contents, config=config)
+        except Exception as e:
+            self.cassette.record("generate_content", request, None, time.perf_counter() - t0, error=e)
+            raise
+        self.cassette.record("generate_content", request, _dump(response), time.perf_counter() - t0)
+        return response
+
+
+class CassetteClient:
+    """Stands in for genai.Client; only client.models.generate_content is used by the backend."""
+    def __init__(self, cassette, client):
+        self.models = CassetteModels(cassette, client.models if client else None)
+
+
+class CassetteSearch:
+    """Stands in for a DDGS() instance; only .text() is used by the backend."""
+    def __init__(self, cassette, ddgs):
+        self.cassette, self.ddgs = cassette, ddgs
+
+    def text(self, keywords, max_results=None):
+        request = {"keywords": keywords, "max_results": max_results}
+        if self.cassette.mode == "replay": return self.cassette.replay("ddgs_text", request)
+        t0 = time.perf_counter()
+        try:
+            results = list(self.ddgs.text(keywords, max_results=max_results))
+        except Exception as e:
+            self.cassette.record("ddgs_text", request, None, time.perf_counter() - t0, error=e)
+            raise
+        self.cassette.record("ddgs_text", request, results, time.perf_counter() - t0)
+        return results
+
+
+# --- SELF-CHECK ---
+def selfcheck():
+    import tempfile
+
+    class FakeModels:
+        def generate_content(self, *, model, contents, config=None):
+            if model == "broken": raise ValueError("404 model not found")
+            from google.genai import types
+            return types.GenerateContentResponse(candidates=[{"content": {"parts": [{"text": contents.upper()}], "role": "model"}}])
+
+    class FakeDDGS:
+        def text(self, keywords, max_results=None):
+            if keywords == "ratelimited": raise RuntimeError("202 Ratelimit")
+            return [{"title": keywords, "body": "b"}] * max_results
+
+    def outcome(call):
+        try: return "ok", call()
+        except (CassetteMiss, RecordedError) as e: return type(e).__name__, str(e)
+        except Exception as e: return "RecordedError", str(e)  # the live error, replayed as RecordedError
+
+    try:
+        import google.genai  # noqa: F401 - the successful generate_content case needs real response types
+        has_genai = True
+    except ImportError:
+        has_genai = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "selfcheck.json.gz")
+        calls = [
+            lambda c: c.wrap_search(FakeDDGS).text("tools", max_results=2),
+            lambda c: c.wrap_search(FakeDDGS).text("ratelimited", max_results=2),
+            lambda c: c.wrap_client(lambda: type("C", (), {"models": FakeModels()})()).models.generate_content(model="broken", contents="hi"),
+        ]
+        if has_genai:
+            calls.append(lambda c: c.wrap_client(lambda: type("C", (), {"models": FakeModels()})()).models.generate_content(model="m", contents="hi").text)
+
+        recorder = Cassette(path, "record")
+        recorded = [outcome(lambda: call(recorder)) for call in calls]
+        # No save(): replay must recover everything from the journal, as after a SIGKILL
+        assert not os.path.exists(path) and os.path.exists(recorder.journal)
+        Cassette(path, "record").save()
+        assert os.path.exists(path) and not os.path.exists(recorder.journal)
+        player = Cassette(path, "replay")
+        replayed = [outcome(lambda: call(player)) for call in calls]
+        assert replayed == recorded, (recorded, replayed)
+        assert player.misses == 0
+        assert outcome(lambda: player.wrap_search(None).text("never recorded"))[0] == "CassetteMiss"
+        assert player.misses == 1
+    print(f"cassette self-check passed ({len(calls)} calls{'' if has_genai else ', generate_content success skipped: google-genai not installed'})")
+
+
+if __name__ == "__main__":
+    selfcheck()
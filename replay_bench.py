@@ -0,0 +1,177 @@
+"""Replay a request corpus through the backend endpoints against a cassette.
+
+Corpus is JSONL, one request per line, in either form:
+  {"request_id": "r1", "endpoint": "/generate_plan", "body": {...PlanRequest...}}
+  {"request_id": "r2", "title": "...", "body": "free-text app idea"}
+
+The second (the requests.jsonl seed format) runs the full user flow:
+/analyze_idea, then /generate_plan with the returned questions.
+
+  python replay_bench.py record corpus.jsonl --cassette cassettes/corpus.json.gz   (live upstreams)
+  python replay_bench.py replay corpus.jsonl --cassette cassettes/corpus.json.gz   (offline)
+
+Replay reports per-stage CPU time, wall time and peak traced allocations.
+Timings come from --runs passes with tracemalloc off; allocations from one
+extra traced pass. Stage CPU is thread time of the worker running the stage;
+total CPU is process time, so "other" includes the TestClient and event-loop threads.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cassette
+
+SEED_DEFAULTS = {"budget": "$25", "skill": "Beginner", "priority": "Speed", "vibe": "Senior Engineer"}
+
+
+def load_corpus(path):
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip(): continue
+            row = json.loads(line)
+            yield row.get("request_id", f"line-{n}"), row
+
+
+def steps_for(row):
+    if "endpoint" in row:
+        yield row["endpoint"], row["body"]
+        return
+    idea = row["body"] if isinstance(row["body"], str) else row["body"]["app_idea"]
+    analysis = yield "/analyze_idea", {"app_idea": idea}
+    questions = (analysis or {}).get("questions", [])
+    yield "/generate_plan", {"app_idea": idea, "questions": questions, "answers": [], **SEED_DEFAULTS}
+
+
+class StageRecorder:
+    def __init__(self, trace_alloc=False):
+        self.trace_alloc = trace_alloc
+        self.stats = defaultdict(lambda: {"calls": 0, "cpu_ms": 0.0, "wall_ms": 0.0, "peak_kb": 0.0})
+        self._abs_peak = 0
+
+    def _mark(self):
+        if not self.trace_alloc: return 0
+        current, peak = tracemalloc.get_traced_memory()
+        self._abs_peak = max(self._abs_peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextmanager
+    def __call__(self, name):
+        # Stages run start to finish on one worker thread, so thread_time excludes the other threads
+        start = self._mark()
+        c0, w0 = time.thread_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            c1, w1 = time.thread_time(), time.perf_counter()
+            peak = self._peak()
+            self._add(name, c1 - c0, w1 - w0, peak - start)
+
+    @contextmanager
+    def total(self):
+        # Stages reset the tracemalloc peak, so the overall peak is the max seen at every stage boundary
+        start = self._mark()
+        self._abs_peak = 0
+        c0, w0 = time.process_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            c1, w1 = time.process_time(), time.perf_counter()
+            self._peak()
+            self._add("total", c1 - c0, w1 - w0, self._abs_peak - start)
+
+    def _peak(self):
+        # Peak since the last _mark(); also folded into the running peak used by total()
+        if not self.trace_alloc: return 0
+        peak = tracemalloc.get_traced_memory()[1]
+        self._abs_peak = max(self._abs_peak, peak)
+        return peak
+
+    def _add(self, name, cpu, wall, peak):
+        s = self.stats[name]
+        s["calls"] += 1
+        s["cpu_ms"] += cpu * 1000
+        s["wall_ms"] += wall * 1000
+        s["peak_kb"] = max(s["peak_kb"], peak / 1024)
+
+
+def run(client, corpus, recorder):
+    failures = []
+    for request_id, row in corpus:
+        gen, result = steps_for(row), None
+        try:
+            while True:
+                endpoint, body = gen.send(result)
+                with recorder.total(): resp = client.post(endpoint, json=body)
+                if resp.status_code != 200: failures.append((request_id, endpoint, resp.status_code, resp.text[:200]))
+                result = resp.json() if resp.status_code == 200 else None
+        except StopIteration:
+            pass
+    return failures
+
+
+def report(stats, runs):
+    total = stats.get("total")
+    lines = [f"{'stage':<8} {'calls':>6} {'cpu_ms':>10} {'wall_ms':>10} {'peak_kb':>10}"]
+    for name in ["search", "llm", "parse", "total"]:
+        if name not in stats: continue
+        s = stats[name]
+        lines.append(f"{name:<8} {s['calls'] // runs:>6} {s['cpu_ms'] / runs:>10.2f} {s['wall_ms'] / runs:>10.2f} {s['peak_kb']:>10.1f}")
+    if total:
+        own = total["cpu_ms"] - sum(stats[n]["cpu_ms"] for n in ("search", "llm", "parse") if n in stats)
+        lines.append(f"{'other':<8} {'':>6} {own / runs:>10.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=cassette.MODES)
+    parser.add_argument("corpus")
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--timing", action="store_true", help="replay with the recorded upstream latency")
+    parser.add_argument("--runs", type=int, default=1, help="replay the corpus N times (stats are per-run averages)")
+    parser.add_argument("--json", action="store_true", help="print raw stats as JSON")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    import backend
+
+    backend.CASSETTE = cassette.Cassette(args.cassette, args.mode, timing=args.timing)
+    backend.warmup()  # import heavy modules up front so they don't land in the first request's numbers
+    client = TestClient(backend.app)
+    corpus = list(load_corpus(args.corpus))
+
+    runs = args.runs if args.mode == "replay" else 1
+    recorder, allocs = StageRecorder(), StageRecorder(trace_alloc=True)
+    failures = []
+    try:
+        cassette.set_stage_hook(recorder)
+        for _ in range(runs): failures.extend(run(client, corpus, recorder))
+        misses = backend.CASSETTE.misses
+        if args.mode == "replay":
+            # tracemalloc inflates CPU time severalfold, so allocations get their own pass.
+            # It repeats the timed requests, so its failures and misses are left out of the report.
+            cassette.set_stage_hook(allocs)
+            tracemalloc.start()
+            try: run(client, corpus, allocs)
+            finally: tracemalloc.stop()
+    finally:
+        cassette.set_stage_hook(None)
+        backend.CASSETTE.save()
+    for name, s in recorder.stats.items(): s["peak_kb"] = allocs.stats[name]["peak_kb"]
+
+    if args.json: print(json.dumps({"runs": runs, "requests": len(corpus), "stages": recorder.stats, "failures": failures,
+                                    "cassette_misses": misses}, indent=2))
+    else:
+        print(f"{len(corpus)} corpus entries x {runs} run(s), cassette={args.cassette} ({len(backend.CASSETTE.entries)} recordings)")
+        print(report(recorder.stats, runs))
+        for f in failures: print(f"FAILED {f[0]} {f[1]} -> {f[2]}: {f[3]}")
+        if misses: print(f"{misses} cassette miss(es)")
+    if failures or misses: raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()